@@ -14,7 +14,6 @@ https://stackoverflow.com/questions/53611690/how-do-i-write-consistent-stateful-
 # have a separate context
 
 
-from contextlib import contextmanager
 #from contextvars import ContextVar, Context, copy_context
 
 from extracontext import PyContextLocal
@@ -22,17 +21,23 @@ from extracontext import PyContextLocal
 ctx = PyContextLocal()
 
 
-@contextmanager
-def use_mode(mode):
-    ctx.MODE = mode
-    print("entering use_mode")
-    print_mode()
-    try:
-        yield
-    finally:
+class UseMode:
+    # A plain class, rather than a @contextmanager generator:
+    # no generator is created and driven on each `with` block.
+    __slots__ = ("mode",)
+
+    def __init__(self, mode):
+        self.mode = mode
 
+    def __enter__(self):
+        ctx.MODE = self.mode
+        print("entering use_mode")
+        print_mode()
+
+    def __exit__(self, *exc_info):
         pass
 
+
 def print_mode():
    print(f'Mode {ctx.MODE}')
 
@@ -42,8 +47,8 @@ def first():
     ctx.MODE = 0
     print('Start first')
     print_mode()
-    with use_mode(1):
-        print('In first: with use_mode(1)')
+    with UseMode(1):
+        print('In first: with UseMode(1)')
         print('In first: start second')
         it = second()
         next(it)
@@ -60,8 +65,8 @@ def first():
 def second():
     print('Start second')
     print_mode()
-    with use_mode(2):
-        print('In second: with use_mode(2)')
+    with UseMode(2):
+        print('In second: with UseMode(2)')
         print('In second: yield')
         yield
         print('In second: continue')
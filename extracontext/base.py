@@ -1,20 +1,52 @@
 # from typing import Self
 
+import inspect
+from functools import partial
+
+
+def _code_flags(callable_) -> int:
+    """Code flags of the function ultimately called by "callable_"
+
+    Looks through bound methods and functools.partial objects,
+    as the "inspect.is*function" predicates do - but unlike them, only
+    reports what the code object says: a plain function merely marked
+    with "inspect.markcoroutinefunction" has no coroutine flag.
+    Returns 0 for callables with no code object.
+    """
+    while True:
+        if inspect.ismethod(callable_):
+            callable_ = callable_.__func__
+        elif isinstance(callable_, partial):
+            callable_ = callable_.func
+        else:
+            break
+    code = getattr(callable_, "__code__", None)
+    return code.co_flags if code is not None else 0
+
 
 class ContextLocal:
+    __slots__ = ()
+
     _backend_registry: dict[str, type["ContextLocal"]] = {}
+    _default_backend = "native"
 
     def __new__(cls, *args, backend=None, **kwargs):
-        if backend is None:
-            backend = getattr(cls, "_backend_key", "native")
-        cls = cls._backend_registry[backend]
+        if backend is not None:
+            cls = cls._backend_registry[backend]
+        elif not hasattr(cls, "_backend_key"):
+            # Abstract entry point (ContextLocal, ContextMap): pick the default.
+            # Concrete backends are instantiated directly, with no lookup.
+            cls = cls._backend_registry[cls._default_backend]
         ## Do not forward arguments to object.__new__
-        if len(__class__.__mro__) == 2:
-            args, kwargs = (), {}
-        return super().__new__(cls, *args, **kwargs)
+        return super().__new__(cls)
+
+    def __class_getitem__(cls, backend: str) -> type["ContextLocal"]:
+        # ContextLocal["python"] resolves the concrete class once,
+        # so it can be instantiated directly, skipping the lookup in __new__
+        return cls._backend_registry[backend]
 
-    def __init__(self, *, backend=None):
-        pass
+    # No __init__ here: object.__init__ is used directly.
+    # Concrete backends take (and ignore) the "backend" argument themselves.
 
     def __init_subclass__(cls, *args, **kw):
         if hasattr(cls, "_backend_key"):
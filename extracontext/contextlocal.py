@@ -17,15 +17,17 @@ visible inside  the decorated callable.
 
 """
 
-import uuid
+import inspect
+import itertools
 import sys
 import typing as T
 
 from functools import wraps
-from types import FrameType
-from weakref import WeakKeyDictionary
+from operator import attrgetter
+from types import AsyncGeneratorType, CoroutineType, FrameType, GeneratorType
+from weakref import ref
 
-from .base import ContextLocal
+from .base import ContextLocal, _code_flags
 
 __author__ = "João S. O. Bueno"
 __license__ = "LGPL v. 3.0+"
@@ -37,6 +39,17 @@ class ContextError(AttributeError):
 
 _sentinel = object()
 
+_getframe = sys._getframe
+
+_id_counter = itertools.count(1).__next__
+
+# Frame getters for the objects whose execution gets its own context
+_frame_getters = {
+    GeneratorType: attrgetter("gi_frame"),
+    CoroutineType: attrgetter("cr_frame"),
+    AsyncGeneratorType: attrgetter("ag_frame"),
+}
+
 
 class _WeakableId:
     """Used internally to identify Frames with context data attached using weakrefs"""
@@ -45,17 +58,20 @@ class _WeakableId:
 
     def __init__(self, v=0):
         if not v:
-            v = int(uuid.uuid4())
+            v = _id_counter()
         self.value = v
 
-    def __eq__(self, other):
-        return self.value == other.value
+    def __repr__(self):
+        return f"ID({self.value})"
 
-    def __hash__(self):
-        return hash(self.value)
 
-    def __repr__(self):
-        return f"ID({uuid.UUID(int=self.value)})"
+def _discard_frame(registry: dict, anchors: dict, key: int) -> T.Callable:
+    def callback(salt_ref):
+        if anchors.get(key) is salt_ref:
+            del anchors[key]
+            registry.pop(key, None)
+
+    return callback
 
 
 class PyContextLocal(ContextLocal):
@@ -70,9 +86,10 @@ class PyContextLocal(ContextLocal):
     context: normal attribute access and assignment works transparently.
 
     Internally, the current implementation uses a completly different way to
-    keep distinct states where needed: the "locals" mapping for each execution
-    frame is used as storage for the unique values in an async task context, or in
-    a thread. Although not recomended up to now, read/write access to non-local-variables
+    keep distinct states where needed: contexts are attached to execution
+    frames, and the "locals" mapping of frames holding a context that is not
+    explicitly closed is used to anchor the storage for the unique values
+    in an async task context, or in a thread. Although not recomended up to now, read/write access to non-local-variables
     in the "locals" mapping is specified on PEP 558. While that PEP is not
     final, it is clear in its texts that the capability of using "locals" as
     a mapping to convey data will be kept and made official.
@@ -85,15 +102,20 @@ class PyContextLocal(ContextLocal):
 
     """
 
+    __slots__ = ("_et_registry", "_et_anchors", "__weakref__")
+
     # TODO: change _BASEDIST to a property counting the intermediate
     # methods between subclasses and the methods here.
     _BASEDIST = 0
 
     _backend_key = "python"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        super().__setattr__("_et_registry", WeakKeyDictionary())
+    def __init__(self, *, backend=None):
+        super().__init__()
+        # registry: id(frame) -> stack of namespaces registered for that frame,
+        # innermost first
+        super().__setattr__("_et_registry", {})
+        super().__setattr__("_et_anchors", {})
 
     def _introspect_registry(
         self, name: T.Optional[str] = None, starting_frame: int = 2
@@ -106,19 +128,26 @@ class PyContextLocal(ContextLocal):
         This way callers can tell if the searched name is on the topmost
         namespace and act accordingly. ("del" needs this information,
         as it can't remove information on an outter namespace)
+        Registry hits on anchored frames read that frame's f_locals
+        to check its salt (see "_frameid").
         """
-        starting_frame += self._BASEDIST
-        f: T.Optional[FrameType] = sys._getframe(starting_frame)
+        registry = self._et_registry
+        anchors = self._et_anchors
+        # With nothing registered anywhere, there is no need to walk the stack
+        f: T.Optional[FrameType] = (
+            _getframe(starting_frame + self._BASEDIST) if registry else None
+        )
         count = 0
         first_ns = None
         while f:
-            hf = self._frameid(f)
-            if hf in self._et_registry:
+            key = id(f)
+            namespaces = registry.get(key)
+            if namespaces is not None and (
+                key not in anchors or self._owns_entry(key, f)
+            ):
                 if first_ns is None:
                     first_ns = count
-                registered_namespaces = f.f_locals["$contexts"]
-                for namespace_index in reversed(self._et_registry[hf]):
-                    namespace = registered_namespaces[namespace_index]
+                for namespace in namespaces:
                     if name is None or name in namespace:
                         return namespace, (first_ns, count)
                     count += 1
@@ -128,22 +157,91 @@ class PyContextLocal(ContextLocal):
             raise ContextError(f"{name !r} not defined in any previous context")
         raise ContextError("No previous context set")
 
-    def _frameid(self, frame: FrameType) -> _WeakableId:
-        if not "$contexts_salt" in frame.f_locals:
-            frame.f_locals["$contexts_salt"] = _WeakableId()
-        return frame.f_locals["$contexts_salt"]
-
-    def _register_context(self, f: FrameType) -> None:
+    def _top_namespace(self, starting_frame: int = 2) -> T.Optional[dict]:
+        """
+        Fast path for the innermost namespace visible from the calling code,
+        which is all attribute assignment needs: no name checks and
+        no bookkeeping of namespace distances - though, as in
+        "_introspect_registry", an anchored hit still reads f_locals.
+        Returns None if no context is set.
+        """
+        registry = self._et_registry
+        if not registry:
+            return None
+        anchors = self._et_anchors
+        f: T.Optional[FrameType] = _getframe(starting_frame + self._BASEDIST)
+        while f:
+            key = id(f)
+            namespaces = registry.get(key)
+            if namespaces and (key not in anchors or self._owns_entry(key, f)):
+                return namespaces[0]
+            f = f.f_back
+        return None
+
+    def _frameid(self, frame: FrameType) -> int:
+        # Frames with a context registered are keyed by their id.
+        # For frames whose context is not explicitly removed
+        # (implicit contexts, and generator and coroutine frames),
+        # a salt stored in their "locals" lives as long as the frame does,
+        # and takes the registry entry along when it goes away.
+        # As the "locals" may outlive the frame, entries found for anchored
+        # frames are also checked against the frame's own salt, so
+        # a recycled frame address can't be mistaken for a registered one.
+        # That check reads the (costly to materialize) f_locals of the frame,
+        # on every lookup that hits an anchored entry - stack walks included.
+        # Only entries pushed and popped explicitly (decorated calls and
+        # "with" blocks) are found without touching f_locals.
+        key = id(frame)
+        if key not in self._et_anchors or not self._owns_entry(key, frame):
+            salt = frame.f_locals.get("$contexts_salt")
+            if salt is None:
+                salt = frame.f_locals["$contexts_salt"] = _WeakableId()
+            self._et_anchors[key] = ref(
+                salt, _discard_frame(self._et_registry, self._et_anchors, key)
+            )
+        return key
+
+    def _owns_entry(self, key: int, frame: FrameType) -> bool:
+        """
+        Checks that the anchored registry entry under "key" belongs to "frame".
+        The "locals" mapping of a frame can outlive it (for example,
+        when a reference to "locals()" is kept around), and with it
+        the salt anchoring its registry entry: a new frame allocated
+        at the same address must not inherit that entry.
+        Stale entries are dropped as they are found.
+        """
+        # The salt weakref callback may drop the anchor at any time
+        # (even from another thread): no "in" check followed by indexing.
+        salt_ref = self._et_anchors.get(key)
+        if salt_ref is None:
+            return False
+        salt = salt_ref()
+        if salt is not None and frame.f_locals.get("$contexts_salt") is salt:
+            return True
+        self._et_anchors.pop(key, None)
+        self._et_registry.pop(key, None)
+        return False
+
+    def _register_context(self, f: FrameType) -> dict:
         hf = self._frameid(f)
-        contexts_list = f.f_locals.setdefault("$contexts", [])
-        contexts_list.append({})
-        self._et_registry.setdefault(hf, []).append(len(contexts_list) - 1)
+        namespace: dict = {}
+        self._et_registry.setdefault(hf, []).insert(0, namespace)
+        return namespace
+
+    def _push_context(self, f: FrameType) -> None:
+        # For contexts that are explicitly popped before "f" ends
+        # ("with" blocks): no need to anchor them to the frame lifetime
+        key = id(f)
+        if key in self._et_anchors:
+            self._owns_entry(key, f)
+        self._et_registry.setdefault(key, []).insert(0, {})
 
     def _pop_context(self, f: FrameType) -> None:
-        hf = self._frameid(f)
-        context_being_popped = self._et_registry[hf].pop()
-        contexts_list = f.f_locals["$contexts"]
-        contexts_list[context_being_popped] = None
+        key = id(f)
+        namespaces = self._et_registry[key]
+        namespaces.pop(0)
+        if not namespaces and key not in self._et_anchors:
+            del self._et_registry[key]
 
     def __getattr__(self, name: str) -> T.Any:
         try:
@@ -156,13 +254,11 @@ class PyContextLocal(ContextLocal):
             raise AttributeError(f"Attribute not set: {name}")
 
     def __setattr__(self, name: str, value: T.Any) -> None:
-        try:
-            namespace, _ = self._introspect_registry()
-        except ContextError:
+        namespace = self._top_namespace()
+        if namespace is None:
             # Automatically creates a new namespace if not inside
             # any explicit denominated context:
-            self._register_context(sys._getframe(1 + self._BASEDIST))
-            namespace, _ = self._introspect_registry()
+            namespace = self._register_context(_getframe(1 + self._BASEDIST))
 
         namespace[name] = value
 
@@ -171,62 +267,77 @@ class PyContextLocal(ContextLocal):
             namespace, (topmost_ns, found_ns) = self._introspect_registry(name)
         except ContextError:
             raise AttributeError(name)
-        if topmost_ns == found_ns:
-            result = namespace[name]
-            if result is not _sentinel:
-                if "$deleted" in namespace and name in namespace["$deleted"]:
-                    # attribute exists in target namespace, but the outter
-                    # attribute had previously been shadowed by a delete -
-                    # restore the shadowing:
-                    setattr(self, name, _sentinel)
-
-                else:
-                    # Remove topmost name assignemnt, and outer value is exposed
-                    # ("one_level" attribute stacking behavior as described in 'features.py'
-                    # disbled as unecessaryly complex):
-                    # del namespace[name]
-
-                    # To preserve  "entry_only" behavior:
-                    namespace.setdefault("$deleted", set()).add(name)
-                    setattr(self, name, _sentinel)
-                return
+        if topmost_ns == found_ns and namespace[name] is _sentinel:
             # value is already shadowed:
             raise AttributeError(name)
-
-        # Name is found, but it is not on the top-most level, so attribute is shadowed:
+        # Names are never removed from a namespace: the deleted value
+        # is shadowed by storing "_sentinel" in the topmost namespace.
+        # (This preserves the "entry_only" behavior described in 'features.py':
+        # deleting a name in an inner context won't expose the outer value)
         setattr(self, name, _sentinel)
-        # fossil: namespace, _ = self._introspect_registry(name)
-        namespace.setdefault("$deleted", set()).add(name)
 
     def __call__(self, callable_: T.Callable) -> T.Callable:
+        # Decided by the code flags only: functions just marked as
+        # coroutine functions (e.g. "inspect.markcoroutinefunction") run
+        # their body when called, and need the generic wrapper.
+        flags = _code_flags(callable_)
+        if flags & inspect.CO_GENERATOR:
+            get_frame = _frame_getters[GeneratorType]
+        elif flags & inspect.CO_COROUTINE:
+            get_frame = _frame_getters[CoroutineType]
+        elif flags & inspect.CO_ASYNC_GENERATOR:
+            get_frame = _frame_getters[AsyncGeneratorType]
+        else:
+            get_frame = None
+
+        # Resolved once, here, rather than on each call of the wrapper:
+        register_context = self._register_context
+        registry = self._et_registry
+        anchors = self._et_anchors
+        getframe = _getframe
+
+        if get_frame is not None:
+            # No user code runs when these are called: skip registering
+            # a context for the wrapper frame, and just give one to the
+            # frame of the generator, coroutine or async generator created.
+            @wraps(callable_)
+            def frame_wrapper(*args, **kw):
+                result = callable_(*args, **kw)
+                register_context(get_frame(result))
+                return result
+
+            return frame_wrapper
+
+        frame_getters = _frame_getters
+
         @wraps(callable_)
         def wrapper(*args, **kw):
-            f = sys._getframe()
-            self._register_context(f)
-            f_id = self._frameid(f)
+            # The wrapper frame context is removed when the call is over:
+            # no need to anchor it to the frame lifetime.
+            f_id = id(getframe())
+            # An anchor found here was left by a dead frame at the same address
+            anchors.pop(f_id, None)
+            registry[f_id] = [{}]
             result = _sentinel
             try:
                 result = callable_(*args, **kw)
             finally:
-                if f_id in self._et_registry:
-                    del self._et_registry[f_id]
+                del registry[f_id]
                 # Setup context for generator, async generator or coroutine if one was returned:
                 if result is not _sentinel:
-                    frame = None
-                    for frame_attr in ("gi_frame", "ag_frame", "cr_frame"):
-                        frame = getattr(result, frame_attr, None)
-                        if frame:
-                            self._register_context(frame)
+                    result_frame = frame_getters.get(type(result))
+                    if result_frame is not None:
+                        register_context(result_frame(result))
             return result
 
         return wrapper
 
     def __enter__(self):
-        self._register_context(sys._getframe(1))
+        self._push_context(_getframe(1))
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self._pop_context(sys._getframe(1))
+        self._pop_context(_getframe(1))
 
     def _run(self, callable_, *args, **kw):
         """Runs callable with an isolated context
@@ -236,28 +347,30 @@ class PyContextLocal(ContextLocal):
             return callable_(*args, **kw)
 
     def __dir__(self) -> T.List[str]:
-        frame_count = 2
-        all_attrs = set()
-        seen_namespaces = set()
-        while True:
-            try:
-                namespace, _ = self._introspect_registry(starting_frame=frame_count)
-            except (
-                ValueError,
-                ContextError,
-            ):  # ValueError can be raised sys._getframe inside _introspect_registry
-                break
-            frame_count += 1
-            if id(namespace) in seen_namespaces:
-                continue
-            for key, value in namespace.items():
-                if not key.startswith("$") and value is not _sentinel:
-                    all_attrs.add(key)
-
-            seen_namespaces.add(id(namespace))
-        all_attrs = {
-            attr
-            for attr in all_attrs
-            if getattr(self, attr, _sentinel) is not _sentinel
-        }
+        # Single walk over all namespaces visible from the caller, innermost first:
+        # the first namespace a name is found in tells whether it is visible
+        # (it may be shadowed by a deletion, which stores "_sentinel").
+        # Anchored entries have their frame's salt checked, reading f_locals.
+        registry = self._et_registry
+        f: T.Optional[FrameType] = _getframe(1 + self._BASEDIST) if registry else None
+        seen = set()
+        all_attrs = []
+        anchors = self._et_anchors
+        while f:
+            frame_key = id(f)
+            namespaces = registry.get(frame_key, ())
+            if (
+                namespaces
+                and frame_key in anchors
+                and not self._owns_entry(frame_key, f)
+            ):
+                namespaces = ()
+            for namespace in namespaces:
+                for key, value in namespace.items():
+                    if key in seen or key.startswith("$"):
+                        continue
+                    seen.add(key)
+                    if value is not _sentinel:
+                        all_attrs.append(key)
+            f = f.f_back
         return sorted(all_attrs)
@@ -7,15 +7,15 @@ implemented 100% in Python, but backed by PEP 567 stdlib contextvar.ContextVar
 
 """
 
-import asyncio
 import inspect
 import sys
 import threading
 
 from functools import wraps
 from contextvars import ContextVar, copy_context
+from types import AsyncGeneratorType, CoroutineType, GeneratorType, coroutine
 
-from .base import ContextLocal
+from .base import ContextLocal, _code_flags
 
 if sys.implementation.name == "pypy":
     pypy = True
@@ -37,17 +37,58 @@ else:
         warnings.warn(
             "\n\nIf you need this feature in subinterpreters, please open a project issue"
         )
-
-if sys.version_info < (3, 10):
-    from types import AsyncGeneratorType
-
-    anext = AsyncGeneratorType.__anext__
+    else:
+        # Set up once, at import time, rather than checked on each "with" block:
+        _PyContext_Enter = ctypes.pythonapi.PyContext_Enter
+        _PyContext_Exit = ctypes.pythonapi.PyContext_Exit
+        _PyContext_Enter.argtypes = [ctypes.py_object]
+        _PyContext_Exit.argtypes = [ctypes.py_object]
+        _PyContext_Enter.restype = ctypes.c_int32
+        _PyContext_Exit.restype = ctypes.c_int32
 
 __author__ = "João S. O. Bueno"
 __license__ = "LGPL v. 3.0+"
 
 _sentinel = object()
 
+_isawaitable = inspect.isawaitable
+
+_CO_GENERATOR = inspect.CO_GENERATOR
+_CO_COROUTINE = inspect.CO_COROUTINE
+_CO_ASYNC_GENERATOR = inspect.CO_ASYNC_GENERATOR
+_CO_ITERABLE_COROUTINE = inspect.CO_ITERABLE_COROUTINE
+
+
+@coroutine
+def _step_in_context(iterator, ctx):
+    """Drives an awaitable from the awaiting task, running each of its steps in "ctx"
+
+    This is what a Task created with "context=ctx" would do, without
+    creating, scheduling and awaiting an extra Task.
+    """
+    run = ctx.run
+    send = iterator.send
+    throw = iterator.throw
+    value = None
+    error = None
+    while True:
+        try:
+            if error is None:
+                yielded = run(send, value)
+            else:
+                yielded = run(throw, error)
+        except StopIteration as stop:
+            return stop.value
+        error = None
+        try:
+            value = yield yielded
+        except GeneratorExit:
+            run(iterator.close)
+            raise
+        except BaseException as exc:
+            error = exc
+            value = None
+
 
 class NativeContextLocal(ContextLocal):
     """Uses th native contextvar module in the stdlib (PEP 567)
@@ -70,70 +111,117 @@ class NativeContextLocal(ContextLocal):
     [Work In Progress]
     """
 
+    __slots__ = (
+        "_et_registry",
+        "_et_live_keys",
+        "_et_entered",
+        "_et_lock",
+        "__weakref__",
+    )
+
     _backend_key = "native"
-    _ctypes_initialized = False
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    def __init__(self, *, backend=None):
+        super().__init__()
         self._et_registry = {}
-        self._et_stack = {}
+        # Names set in the current context, so "dir" needs no per-variable lookups:
+        self._et_live_keys = ContextVar("_et_live_keys", default=frozenset())
+        # Context entered by a "with" block, and the one to restore on exit
+        self._et_entered = ContextVar("_et_entered")
         self._et_lock = threading.Lock()
 
     def __getattr__(self, name):
-        var = self._et_registry.get(name, None)
-        if var is None:
-            raise AttributeError(f"Attribute not set: {name}")
         try:
-            value = var.get()
-        except LookupError as error:
-            raise AttributeError from error
+            var = self._et_registry[name]
+        except KeyError:
+            raise AttributeError(f"Attribute not set: {name}") from None
+        # A variable never set in the current context, or deleted in it,
+        # both read as "_sentinel":
+        value = var.get(_sentinel)
         if value is _sentinel:
             raise AttributeError(f"Attribute not set: {name}")
         return value
 
     def __setattr__(self, name, value):
-        if name.startswith("_et_"):
+        if name[:4] == "_et_":
             return super().__setattr__(name, value)
-        var = self._et_registry.get(name, _sentinel)
-        if var is _sentinel:
-            var = self._et_registry[name] = ContextVar(name)
+        try:
+            var = self._et_registry[name]
+        except KeyError:
+            # Only creation is guarded: two threads setting a new name at once
+            # must not each get a different ContextVar for it.
+            with self._et_lock:
+                var = self._et_registry.get(name)
+                if var is None:
+                    var = self._et_registry[name] = ContextVar(name)
         var.set(value)
+        live_keys = self._et_live_keys.get()
+        if name not in live_keys:
+            self._et_live_keys.set(live_keys | {name})
+
+    def _bulk_set(self, items):
+        """Sets several (name, value) pairs at once, with a single update
+        of the live names and the creation lock taken only once
+        """
+        registry = self._et_registry
+        names = []
+        with self._et_lock:
+            for name, value in items:
+                var = registry.get(name)
+                if var is None:
+                    var = registry[name] = ContextVar(name)
+                var.set(value)
+                names.append(name)
+        self._et_live_keys.set(self._et_live_keys.get().union(names))
 
     def __delattr__(self, name):
-        if getattr(self, name, _sentinel) is _sentinel:
+        var = self._et_registry.get(name)
+        if var is None or var.get(_sentinel) is _sentinel:
             raise AttributeError(f"Attribute not set: {name}")
-        setattr(self, name, _sentinel)
+        # Shadow the value in the current context only:
+        var.set(_sentinel)
+        self._et_live_keys.set(self._et_live_keys.get() - {name})
 
     def __call__(self, callable_):
+        # Decided by the code flags only: functions just marked as
+        # coroutine functions (e.g. "inspect.markcoroutinefunction") run
+        # their body when called, and need the generic wrapper.
+        flags = _code_flags(callable_)
+        if flags & _CO_GENERATOR:
+            # Generator based coroutines ("@types.coroutine") are awaited, not iterated
+            if flags & _CO_ITERABLE_COROUTINE:
+                wrap_result = self._generator_coroutine_wrapper
+            else:
+                wrap_result = self._generator_wrapper
+        elif flags & _CO_COROUTINE:
+            wrap_result = self._awaitable_wrapper
+        elif flags & _CO_ASYNC_GENERATOR:
+            wrap_result = self._async_generator_wrapper
+        else:
+            wrap_result = None
+
+        if wrap_result is not None:
+            # No user code runs when these are called, so there is no need
+            # to create the generator or coroutine inside the new context:
+            # it only matters when they are iterated or awaited.
+            @wraps(callable_)
+            def factory_wrapper(*args, **kw):
+                return wrap_result(callable_(*args, **kw), copy_context())
+
+            return factory_wrapper
+
         @wraps(callable_)
         def wrapper(*args, **kw):
             return self._run(callable_, *args, **kw)
 
         return wrapper
 
-    def _ensure_api_ready(self):
-        if not self._ctypes_initialized:
-            ctypes.pythonapi.PyContext_Enter.argtypes = [ctypes.py_object]
-            ctypes.pythonapi.PyContext_Exit.argtypes = [ctypes.py_object]
-            ctypes.pythonapi.PyContext_Enter.restype = ctypes.c_int32
-            ctypes.pythonapi.PyContext_Exit.restype = ctypes.c_int32
-            self.__class__._ctypes_initialized = True
-
-    def _get_ctx_key(self):
-        key_thread = threading.current_thread()
-        try:
-            key_task = asyncio.current_task()
-        except RuntimeError:
-            key_task = None
-        return (key_thread, key_task)
-
     def _enter_ctx(self, new_ctx):
         if pypy:
             prev_ctx = _get_contextvar_context()
             _set_contextvar_context(new_ctx)
             return prev_ctx
-        self._ensure_api_ready()
-        result = ctypes.pythonapi.PyContext_Enter(new_ctx)
+        result = _PyContext_Enter(new_ctx)
         if result != 0:
             raise RuntimeError(f"Something went wrong entering context {new_ctx}")
         return None
@@ -142,25 +230,22 @@ class NativeContextLocal(ContextLocal):
         if pypy:
             _set_contextvar_context(prev_ctx)
             return
-        result = ctypes.pythonapi.PyContext_Exit(current_ctx)
+        result = _PyContext_Exit(current_ctx)
         if result != 0:
             raise RuntimeError(f"Something went wrong exiting context {current_ctx}")
 
     def __enter__(self):
         new_ctx = copy_context()
         prev_ctx = self._enter_ctx(new_ctx)
-        with self._et_lock:
-            self._et_stack.setdefault(self._get_ctx_key(), []).append(
-                (new_ctx, prev_ctx)
-            )
+        # Recorded in the entered context itself: each thread and task
+        # (and each nesting level) sees just its own entry.
+        self._et_entered.set((new_ctx, prev_ctx))
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        key = self._get_ctx_key()
-        with self._et_lock:
-            current_ctx, prev_ctx = self._et_stack[key].pop()
-            if not self._et_stack[key]:
-                self._et_stack.pop(key)
+        current_ctx, prev_ctx = self._et_entered.get()
+        # Don't leave the context referencing itself:
+        self._et_entered.set(None)
         self._exit_ctx(current_ctx, prev_ctx)
 
     def _run(self, callable_, *args, **kw):
@@ -169,86 +254,70 @@ class NativeContextLocal(ContextLocal):
         """
         new_context = copy_context()
         result = new_context.run(callable_, *args, **kw)
-        if inspect.isawaitable(result):
-            result = self._awaitable_wrapper(result, new_context)
-        elif inspect.isgenerator(result):
-            result = self._generator_wrapper(result, new_context)
-        elif inspect.isasyncgen(result):
-            result = self._async_generator_wrapper(result, new_context)
-            # raise NotImplementedError("NativeContextLocal doesn't yet work with async generators")
+        # Exact type lookup for the common cases - "inspect" is only
+        # needed to tell apart other awaitables (like futures)
+        result_type = type(result)
+        if (
+            result_type is GeneratorType
+            and result.gi_code.co_flags & _CO_ITERABLE_COROUTINE
+        ):
+            return self._generator_coroutine_wrapper(result, new_context)
+        wrap_result = _WRAPPERS.get(result_type)
+        if wrap_result is not None:
+            return wrap_result(result, new_context)
+        if _isawaitable(result):
+            return self._awaitable_wrapper(result, new_context)
         return result
 
     @staticmethod
     def _generator_wrapper(generator, ctx_copy):
-        value = None
-        while True:
-            try:
-                if value is None:
-                    value = yield ctx_copy.run(next, generator)
-                else:
-                    value = yield ctx_copy.run(generator.send, value)
-            except StopIteration as stop:
-                return stop.value
-            except GeneratorExit:
-                ctx_copy.run(generator.close)
-                raise
-            except Exception as exc:
-                # for debugging times: this will be hard without a break here!
-                # print(exc)
+        run = ctx_copy.run
+        send = generator.send
+        throw = generator.throw
+        try:
+            # The first step is the only one not taking a sent value:
+            yielded = run(next, generator)
+            while True:
                 try:
-                    value = ctx_copy.run(generator.throw, exc)
-                except StopIteration as stop:
-                    return stop.value
-
-    if sys.version_info >= (3, 11):
-
-        async def _awaitable_wrapper(self, coro, ctx_copy):
-            def trampoline():
-                return asyncio.create_task(coro, context=ctx_copy)
-
-            return await ctx_copy.run(trampoline)
-
-    else:
-
-        async def _awaitable_wrapper(self, coro, ctx_copy):
-            from ._future_task import FutureTask
-
-            loop = asyncio.get_running_loop()
-
-            def trampoline():
-                return FutureTask(coro, loop=loop, context=ctx_copy)
-
-            return await ctx_copy.run(trampoline)
+                    value = yield yielded
+                except GeneratorExit:
+                    run(generator.close)
+                    raise
+                except Exception as exc:
+                    # Whatever the generator yields in response to
+                    # the exception goes straight to the consumer:
+                    yielded = run(throw, exc)
+                else:
+                    yielded = run(send, value)
+        except StopIteration as stop:
+            return stop.value
 
-        ## this fails in spetacular and inovative ways!
-        # async def _awaitable_wrapper(self, coro, ctx_copy, force_context=True):
-        # if force_context:
-        # try:
-        # self._enter_ctx(ctx_copy)
-        # result = await coro
-        # finally:
-        # self._exit_ctx(ctx_copy)
-        # return result
-        # else:
-        # return await coro
+    @staticmethod
+    async def _awaitable_wrapper(awaitable, ctx_copy):
+        return await _step_in_context(awaitable.__await__(), ctx_copy)
 
-        async def _awaitable_wrapper2(self, coro, ctx_copy):
-            raise NotImplementedError(
-                """This code will only work with Python versions > 3.11. Please use `ContextLocal(backend="python")` for Python version 3.8 - 3.10"""
-            )
+    @staticmethod
+    async def _generator_coroutine_wrapper(generator, ctx_copy):
+        # Generator based coroutines have no "__await__": they are driven directly
+        return await _step_in_context(generator, ctx_copy)
 
-    async def _async_generator_wrapper(self, generator, ctx_copy):
+    @staticmethod
+    async def _async_generator_wrapper(generator, ctx_copy):
+        # Bound once per wrapped generator, instead of on every step
+        run = ctx_copy.run
+        anext_, asend = generator.__anext__, generator.asend
+        athrow, aclose = generator.athrow, generator.aclose
         value = None
         while True:
             try:
                 if value is None:
-                    async_res = ctx_copy.run(anext, generator)
+                    async_res = run(anext_)
                 else:
-                    async_res = ctx_copy.run(generator.asend, value)
-                value = yield await self._awaitable_wrapper(async_res, ctx_copy)
+                    async_res = run(asend, value)
+                value = yield await _step_in_context(async_res.__await__(), ctx_copy)
             except GeneratorExit:
-                async_res = ctx_copy.run(generator.aclose)
-                await self._awaitable_wrapper(async_res, ctx_copy)
+                async_res = run(aclose)
+                await _step_in_context(async_res.__await__(), ctx_copy)
                 raise
             except StopAsyncIteration:
                 break
@@ -256,14 +325,20 @@ class NativeContextLocal(ContextLocal):
                 # for debugging times: this will be hard without a break here!
                 # print("*" * 50 , exc)
                 try:
-                    async_res = ctx_copy.run(generator.athrow, exc)
-                    value = yield await self._awaitable_wrapper(async_res, ctx_copy)
+                    async_res = run(athrow, exc)
+                    value = yield await _step_in_context(
+                        async_res.__await__(), ctx_copy
+                    )
                 except StopAsyncIteration:
                     break
 
     def __dir__(self):
-        return list(
-            key
-            for key, value in self._et_registry.items()
-            if value.get() is not _sentinel
-        )
+        return list(self._et_live_keys.get())
+
+
+# Context wrappers for the results of decorated calls, by their exact type
+_WRAPPERS = {
+    CoroutineType: NativeContextLocal._awaitable_wrapper,
+    GeneratorType: NativeContextLocal._generator_wrapper,
+    AsyncGeneratorType: NativeContextLocal._async_generator_wrapper,
+}
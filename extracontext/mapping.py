@@ -14,8 +14,18 @@ class ContextMap(MutableMapping, ContextLocal):
     hardcoded state variables
     """
 
+    __slots__ = ()
+
     _backend_registry = {}
 
+    def __class_getitem__(cls, item):
+        # ContextMap["python"] resolves the backend class, like ContextLocal
+        # (and unknown backend names raise KeyError the same way);
+        # other subscriptions are generic aliases, as for any Mapping
+        if isinstance(item, str):
+            return cls._backend_registry[item]
+        return super().__class_getitem__(item)
+
     # def __init__(self, initial: None | Mapping = None, *, backend=None):
     # super().__init__()
     # if not initial:
@@ -42,10 +52,13 @@ class ContextMap(MutableMapping, ContextLocal):
         return iter(dir(self))
 
     def __len__(self):
-        return len(dir(self))
+        # No need for the sorting "dir" performs just to count the keys:
+        return len(self.__dir__())
 
 
 class PyContextMap(ContextMap, PyContextLocal):
+    __slots__ = ()
+
     _backend_key = "python"
     _BASEDIST = 1
 
@@ -62,11 +75,12 @@ class PyContextMap(ContextMap, PyContextLocal):
 
 
 class NativeContextMap(ContextMap, NativeContextLocal):
+    __slots__ = ()
+
     _backend_key = "native"
 
     def __init__(self, initial: Optional[Mapping] = None, *, backend=None):
         super().__init__()
         if not initial:
             return
-        for key, value in initial.items():
-            self[key] = value
+        self._bulk_set(initial.items())
@@ -0,0 +1,8 @@
+import pytest
+
+from extracontext import PyContextLocal, NativeContextLocal
+
+
+@pytest.fixture(params=[PyContextLocal, NativeContextLocal])
+def ContextClass(request):
+    return request.param
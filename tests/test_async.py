@@ -1,6 +1,8 @@
 import asyncio
+import inspect
 import sys
 import threading
+import types
 
 from extracontext import PyContextLocal, NativeContextLocal
 
@@ -32,9 +34,9 @@ def test_context_local_vars_work_for_async(CtxLocalCls):
     # @ctx
     async def manager():
         ctx.value = -1
-        tasks = asyncio.gather(*(worker(i) for i in range(10)))
+        tasks = asyncio.gather(*[worker(i) for i in range(10)])
         await tasks
-        assert all(i in results for i in range(10))
+        assert results == set(range(10))
         assert ctx.value == -1
 
     asyncio.run(manager())
@@ -65,7 +67,7 @@ def test_threading_local_vars_do_not_work_for_async():
     async def manager():
         nonlocal missing_values
         ctx.value = -1
-        tasks = asyncio.gather(*(worker(i) for i in range(10)))
+        tasks = asyncio.gather(*[worker(i) for i in range(10)])
         await tasks
         missing_values = set(range(10)) - results
         assert ctx.value != -1
@@ -111,13 +113,13 @@ def test_context_local_async_reflect_changes_made_downstream(CtxLocalCls):
     @ctx
     async def manager():
         ctx.value = -1
-        tasks = asyncio.gather(*(worker(i) for i in range(0, 10, 2)))
+        tasks = asyncio.gather(*[worker(i) for i in range(0, 10, 2)])
         await tasks
-        assert all(i in results for i in range(10))
+        assert results == set(range(10))
         assert ctx.value == -1
 
     asyncio.run(manager())
-    assert all(i in results for i in range(10))
+    assert results == set(range(10))
 
 
 def test_nativecontext_local_works_with_tasks():
@@ -177,7 +179,6 @@ def test_context_isolates_async_loop(CtxLocalCls):
     assert ctx.aa == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_works_with_async_generator_send(ContextClass):
     ctx = ContextClass()
 
@@ -213,7 +214,6 @@ def test_context_local_works_with_async_generator_send(ContextClass):
     asyncio.run(controler())
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_works_with_async_generator_throw(ContextClass):
     ctx = ContextClass()
 
@@ -241,7 +241,6 @@ def test_context_local_works_with_async_generator_throw(ContextClass):
     asyncio.run(controler())
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_async_generator_wraps_aclose(ContextClass):
     ctx = ContextClass()
     failed = "GeneratorExit never started"
@@ -286,3 +285,168 @@ def test_context_local_async_generator_wraps_aclose(ContextClass):
 
     asyncio.run(driver())
     assert not failed, failed
+
+
+@pytest.mark.parametrize("decorated", ["coroutine", "factory"])
+def test_context_local_works_with_generator_based_coroutines(ContextClass, decorated):
+    ctx = ContextClass()
+
+    @types.coroutine
+    def gen_coro():
+        ctx.value = 2
+        yield
+        return ctx.value
+
+    if decorated == "coroutine":
+        target = ctx(gen_coro)
+    else:
+        # plain callable returning a generator based coroutine
+        target = ctx(lambda: gen_coro())
+
+    async def main():
+        ctx.value = 1
+        assert await target() == 2
+        assert ctx.value == 1
+
+    asyncio.run(main())
+
+
+def test_decorated_coroutine_runs_in_the_awaiting_task(ContextClass):
+    ctx = ContextClass()
+    tasks = []
+
+    @ctx
+    async def inner():
+        ctx.value = 2
+        tasks.append(asyncio.current_task())
+
+    async def main():
+        ctx.value = 1
+        await inner()
+        assert tasks == [asyncio.current_task()]
+        assert ctx.value == 1
+
+    asyncio.run(main())
+
+
+def test_context_local_coroutine_cancelled_while_awaiting(ContextClass):
+    ctx = ContextClass()
+    seen = []
+
+    @ctx
+    async def inner():
+        ctx.value = 2
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            seen.append(ctx.value)
+            raise
+
+    async def outer():
+        ctx.value = 1
+        try:
+            await inner()
+        finally:
+            seen.append(ctx.value)
+
+    async def main():
+        task = asyncio.create_task(outer())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert seen == [2, 1]
+
+
+def test_context_local_coroutine_handles_exception_thrown_in(ContextClass):
+    ctx = ContextClass()
+
+    @ctx
+    async def target():
+        ctx.value = 2
+        try:
+            await asyncio.sleep(0)
+        except ValueError:
+            return ctx.value
+
+    ctx.value = 1
+    coro = target()
+    coro.send(None)
+    with pytest.raises(StopIteration) as stop:
+        coro.throw(ValueError())
+    assert stop.value.value == 2
+    assert ctx.value == 1
+
+
+def test_context_local_coroutine_closed_while_suspended(ContextClass):
+    ctx = ContextClass()
+    seen = []
+
+    @ctx
+    async def target():
+        ctx.value = 2
+        try:
+            await asyncio.sleep(0)
+        finally:
+            seen.append(ctx.value)
+
+    ctx.value = 1
+    coro = target()
+    coro.send(None)
+    coro.close()
+    assert seen == [2]
+    assert ctx.value == 1
+
+
+def test_context_local_async_generator_aclose_awaits_in_context(ContextClass):
+    ctx = ContextClass()
+    seen = []
+
+    @ctx
+    async def gen():
+        ctx.value = 2
+        try:
+            yield 1
+        finally:
+            await asyncio.sleep(0)
+            seen.append(ctx.value)
+
+    async def main():
+        ctx.value = 1
+        g = gen()
+        assert await anext(g) == 1
+        await g.aclose()
+        assert ctx.value == 1
+
+    asyncio.run(main())
+    assert seen == [2]
+
+
+@pytest.mark.skipif(
+    not hasattr(inspect, "markcoroutinefunction"),
+    reason="inspect.markcoroutinefunction needs Python 3.12",
+)
+@pytest.mark.parametrize("returns", ["coroutine", "future"])
+def test_context_local_isolates_sync_function_marked_as_coroutine_function(
+    ContextClass, returns
+):
+    ctx = ContextClass()
+
+    @ctx
+    @inspect.markcoroutinefunction
+    def marked():
+        ctx.value = 2
+        if returns == "coroutine":
+            return asyncio.sleep(0, result=ctx.value)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(ctx.value)
+        return future
+
+    async def main():
+        ctx.value = 1
+        assert await marked() == 2
+        assert ctx.value == 1
+
+    asyncio.run(main())
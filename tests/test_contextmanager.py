@@ -1,13 +1,6 @@
-from collections import deque
-
-from extracontext import PyContextLocal, NativeContextLocal
-
 import pytest
 
-consume = deque(maxlen=0).extend
-
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_enter_new_context_in_with_block(ContextClass):
 
     ctx = ContextClass()
@@ -21,7 +14,6 @@ def test_context_local_enter_new_context_in_with_block(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_in_with_block_can_see_outside_values(ContextClass):
 
     ctx = ContextClass()
@@ -36,7 +28,6 @@ def test_context_local_in_with_block_can_see_outside_values(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_in_with_block_can_see_outside_values2(ContextClass):
 
     ctx = ContextClass()
@@ -55,7 +46,6 @@ def test_context_local_in_with_block_can_see_outside_values2(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_enter_new_context_in_nested_with_blocks(ContextClass):
 
     ctx = ContextClass()
@@ -75,7 +65,6 @@ def test_context_local_enter_new_context_in_nested_with_blocks(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_in_with_block_dont_mixup_with_other_context(ContextClass):
 
     ctx1 = ContextClass()
@@ -105,7 +94,6 @@ def test_context_local_in_with_block_dont_mixup_with_other_context(ContextClass)
     assert ctx2.value == 2
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_in_with_block_deleted_var_must_be_undeleted_outside(ContextClass):
 
     ctx = ContextClass()
@@ -122,7 +110,6 @@ def test_context_in_with_block_deleted_var_must_be_undeleted_outside(ContextClas
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_in_with_block_deleted_var_must_be_undeleted_outside_even_after_set_again(
     ContextClass,
 ):
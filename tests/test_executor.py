@@ -1,6 +1,6 @@
 import asyncio
 
-from contextvars import ContextVar, copy_context
+from contextvars import ContextVar
 
 # import pytest
 
@@ -44,7 +44,7 @@ def test_executor_preserves_context():
             )
         myvar.set(42)
 
-    copy_context().run(stage_1)
+    stage_1()
 
     assert all_ok, message
 
@@ -82,7 +82,7 @@ def test_executor_preserves_context_context_locals():
             message = f"Context var set to {ctx.value} in thread worker. Expecting 23!"
         ctx.value = 42
 
-    copy_context().run(stage_1)
+    stage_1()
 
     assert all_ok, message
 
@@ -106,7 +106,8 @@ def test_executor_preserves_context_across_several_tasks():
         ctx.value = 255
 
         tasks = [asyncio.create_task(stage_3(i)) for i in range(num_tasks)]
-        await asyncio.gather(*tasks)
+        for task in asyncio.as_completed(tasks):
+            await task
 
         if all_ok:
             all_ok = ctx.value == 255
@@ -129,6 +130,6 @@ def test_executor_preserves_context_across_several_tasks():
             all_ok = False
         ctx.value = 512
 
-    copy_context().run(stage_1)
+    stage_1()
 
     assert all_ok, message
@@ -9,14 +9,11 @@ https://stackoverflow.com/questions/53611690/how-do-i-write-consistent-stateful-
 
 """
 
-from contextlib import contextmanager
+from functools import partial
 
 import pytest
 
-from extracontext import PyContextLocal, NativeContextLocal
 
-
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_vars_work_as_decorator(ContextClass):
     ctx = ContextClass()
 
@@ -30,7 +27,6 @@ def test_context_local_vars_work_as_decorator(ContextClass):
         assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_doesnt_leak_from_generator(ContextClass):
     ctx = ContextClass()
 
@@ -49,7 +45,6 @@ def test_context_local_doesnt_leak_from_generator(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_works_with_generator_send(ContextClass):
     ctx = ContextClass()
 
@@ -80,7 +75,6 @@ def test_context_local_works_with_generator_send(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_works_with_generator_throw(ContextClass):
     ctx = ContextClass()
 
@@ -105,27 +99,63 @@ def test_context_local_works_with_generator_throw(ContextClass):
     assert ctx.value == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
+def test_context_local_generator_throw_yields_next_value(ContextClass):
+    ctx = ContextClass()
+
+    @ctx
+    def gen():
+        ctx.value = 2
+        try:
+            yield 1
+        except RuntimeError:
+            yield ctx.value
+        yield 3
+
+    ctx.value = 1
+    g = gen()
+    assert next(g) == 1
+    assert g.throw(RuntimeError()) == 2
+    assert ctx.value == 1
+    assert next(g) == 3
+
+
+# Steps recorded by test_context_local_vars_work_for_generators, in order
+EXPECTED_GENERATOR_MODES = [
+    ("starting", 0),
+    ("entered first", 1),
+    ("entered second", 2),
+    ("back in first", 1),
+    ("back in second", 2),
+    ("exited second context manager", 1),
+    ("ended second", 1),
+    ("exited first context manager", 0),
+]
+
+
 def test_context_local_vars_work_for_generators(ContextClass):
 
     ctx = ContextClass()
 
     results = []
 
-    @contextmanager
-    def use_mode(mode):
-        previous = ctx.mode
-        ctx.mode = mode
-        try:
-            yield
-        finally:
-            ctx.mode = previous
+    class UseMode:
+        __slots__ = ("mode", "previous")
+
+        def __init__(self, mode):
+            self.mode = mode
+
+        def __enter__(self):
+            self.previous = ctx.mode
+            ctx.mode = self.mode
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            ctx.mode = self.previous
 
     @ctx
     def first():
         ctx.mode = 0
         results.append(("starting", ctx.mode))
-        with use_mode(1):
+        with UseMode(1):
             results.append(("entered first", ctx.mode))
             it = second()
             next(it)
@@ -136,26 +166,16 @@ def test_context_local_vars_work_for_generators(ContextClass):
 
     @ctx
     def second():
-        with use_mode(2):
+        with UseMode(2):
             results.append(("entered second", ctx.mode))
             yield
             results.append(("back in second", ctx.mode))
         results.append(("exited second context manager", ctx.mode))
 
     first()
-    assert results == [
-        ("starting", 0),
-        ("entered first", 1),
-        ("entered second", 2),
-        ("back in first", 1),
-        ("back in second", 2),
-        ("exited second context manager", 1),
-        ("ended second", 1),
-        ("exited first context manager", 0),
-    ]
-
-
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
+    assert results == EXPECTED_GENERATOR_MODES
+
+
 def test_context_local_generator_wraps_close(ContextClass):
     ctx = ContextClass()
     failed = "generator never started"
@@ -194,3 +214,26 @@ def test_context_local_generator_wraps_close(ContextClass):
     step = 2
     del iter_
     assert not failed, failed
+
+
+@pytest.mark.parametrize("kind", ["partial", "bound method"])
+def test_context_local_wraps_partial_and_bound_generator_functions(ContextClass, kind):
+    ctx = ContextClass()
+
+    class Counter:
+        def gen(self, start):
+            ctx.value = start
+            yield ctx.value
+            yield ctx.value + 1
+
+    counter = Counter()
+    if kind == "partial":
+        values = ctx(partial(Counter.gen, counter, 1))()
+    else:
+        values = ctx(counter.gen)(1)
+
+    ctx.value = 0
+    assert next(values) == 1
+    assert ctx.value == 0
+    assert next(values) == 2
+    assert ctx.value == 0
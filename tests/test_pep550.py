@@ -43,7 +43,6 @@ import pytest
 from extracontext import PyContextLocal, NativeContextLocal
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_pep550_generators_preserving(ContextClass):
     """Attributed shielding for test_pep550_generators_preserving
 
@@ -85,8 +84,8 @@ def test_pep550_generators_preserving(ContextClass):
 
 
 @pytest.mark.parametrize(
-    ["ContextClass"],
-    [(PyContextLocal,), pytest.param(NativeContextLocal, marks=pytest.mark.skip)],
+    "ContextClass",
+    [PyContextLocal, pytest.param(NativeContextLocal, marks=pytest.mark.skip)],
 )
 def test_pep550_generators_preserving_after_gen_created(ContextClass):
     """Attributed shielding for test_pep550_generators_preserving
@@ -6,6 +6,8 @@ import pytest
 
 from extracontext import ContextLocal, PyContextLocal, NativeContextLocal
 
+_MISSING = object()
+
 
 @pytest.mark.parametrize(
     ["ContextClass", "backend"],
@@ -16,6 +18,15 @@ def test_backend_can_be_picked_by_keyword(ContextClass, backend):
     assert isinstance(ctx, ContextClass)
 
 
+@pytest.mark.parametrize(
+    ["ContextClass", "backend"],
+    [(PyContextLocal, "python"), (NativeContextLocal, "native")],
+)
+def test_backend_class_can_be_picked_by_subscription(ContextClass, backend):
+    assert ContextLocal[backend] is ContextClass
+    assert isinstance(ContextLocal[backend](), ContextClass)
+
+
 def test_default_backend_is_native():
     ctx = ContextLocal()
     assert isinstance(ctx, NativeContextLocal)
@@ -27,17 +38,14 @@ def test_direct_instantion_of_subclasses_works():
     assert isinstance(NativeContextLocal(), NativeContextLocal)
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_vars_work_as_namespace(ContextClass):
     ctx = ContextClass()
     ctx.value = 1
     assert ctx.value == 1
     del ctx.value
-    with pytest.raises(AttributeError):
-        assert ctx.value == 1
+    assert getattr(ctx, "value", _MISSING) is _MISSING
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_function_holds_unique_value_for_attribute(ContextClass):
     ctx = ContextClass()
     called = False
@@ -58,7 +66,27 @@ def test_context_function_holds_unique_value_for_attribute(ContextClass):
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
+@pytest.mark.parametrize("kind", ["function", "generator"])
+def test_decorated_callable_keeps_wrapped_attributes(ContextClass, kind):
+    ctx = ContextClass()
+
+    if kind == "function":
+
+        def func():
+            pass
+
+    else:
+
+        def func():
+            yield
+
+    func.route = "/index"
+
+    decorated = ctx(func)
+    assert decorated.route == "/index"
+    assert decorated.__wrapped__ is func
+
+
 def test_context_once_value_in_function_is_erased_outer_value_doesnot_gets_visible_back(
     ContextClass,
 ):
@@ -74,8 +102,7 @@ def test_context_once_value_in_function_is_erased_outer_value_doesnot_gets_visib
         ctx.var1 = 2
         assert ctx.var1 == 2
         del ctx.var1
-        with pytest.raises(AttributeError):
-            assert ctx.var1 == 1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
 
     ctx.var1 = 1
     assert ctx.var1 == 1
@@ -84,7 +111,6 @@ def test_context_once_value_in_function_is_erased_outer_value_doesnot_gets_visib
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_inner_function_cant_erase_outter_value(ContextClass):
 
     ctx = ContextClass()
@@ -104,7 +130,6 @@ def test_context_inner_function_cant_erase_outter_value(ContextClass):
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_inner_function_trying_to_erase_outter_value_blocks_cant_read_attribute_back(
     ContextClass,
 ):
@@ -121,8 +146,7 @@ def test_context_inner_function_trying_to_erase_outter_value_blocks_cant_read_at
         assert ctx.var1 == 2
         # removes newly assigned value
         del ctx.var1
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
         assert getattr(ctx, "var1", None) is None
 
         # can't be erased again as well.
@@ -136,7 +160,6 @@ def test_context_inner_function_trying_to_erase_outter_value_blocks_cant_read_at
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_inner_function_deleting_attribute_can_reassign_it(ContextClass):
 
     ctx = ContextClass()
@@ -146,8 +169,7 @@ def test_context_inner_function_deleting_attribute_can_reassign_it(ContextClass)
         ctx.var1 = 2
         assert ctx.var1 == 2
         del ctx.var1
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
         ctx.var1 = 3
         assert ctx.var1 == 3
 
@@ -157,7 +179,6 @@ def test_context_inner_function_deleting_attribute_can_reassign_it(ContextClass)
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_inner_function_reassigning_deleted_value_on_deletion_of_reassignemnt_should_not_see_outer_value(
     ContextClass,
 ):
@@ -170,14 +191,12 @@ def test_context_inner_function_reassigning_deleted_value_on_deletion_of_reassig
         assert ctx.var1 == 2
         del ctx.var1
 
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
         ctx.var1 = 3
         assert ctx.var1 == 3
         del ctx.var1
         # Previously deleted value should remain "deleted"
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
 
     ctx.var1 = 1
     testcall()
@@ -185,15 +204,13 @@ def test_context_inner_function_reassigning_deleted_value_on_deletion_of_reassig
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_granddaugher_works_nice_with_daughter_deleting_attribute(ContextClass):
 
     ctx = ContextClass()
 
     @ctx
     def granddaughter():
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
         ctx.var1 = 2
         assert ctx.var1 == 2
 
@@ -202,8 +219,7 @@ def test_context_granddaugher_works_nice_with_daughter_deleting_attribute(Contex
         assert ctx.var1 == 1
         del ctx.var1
         granddaughter()
-        with pytest.raises(AttributeError):
-            ctx.var1
+        assert getattr(ctx, "var1", _MISSING) is _MISSING
 
     ctx.var1 = 1
     daughter()
@@ -212,61 +228,127 @@ def test_context_granddaugher_works_nice_with_daughter_deleting_attribute(Contex
 
 # Python implementation only:
 def test_each_call_creates_unique_context_and_clean_up():
-    context_keys = set()
+    # frame ids can be reused: keep the namespaces alive and count them instead
+    namespaces = []
 
     ctx = PyContextLocal()
 
     @ctx
     def testcall():
-        context_keys.update(ctx._et_registry.keys())
+        namespaces.extend(ns for stack in ctx._et_registry.values() for ns in stack)
 
     for i in range(10):
         testcall()
 
-    assert len(context_keys) == 10
-    assert len(list(ctx._et_registry.keys())) == 0
+    assert len({id(ns) for ns in namespaces}) == 10
+    assert len(ctx._et_registry) == 0
+
+
+def test_kept_locals_do_not_leak_context_into_new_frames():
+    # Python implementation only:
+    # a frame "locals" mapping can outlive the frame, and a new frame
+    # may be allocated at the same address
+    ctx = PyContextLocal()
+    kept = []
+
+    def leaky():
+        ctx.value = "stale"
+        kept.append(locals())
+
+    def reader():
+        return getattr(ctx, "value", _MISSING)
+
+    leaky()
+    results = [reader() for _ in range(200)]
+    assert "stale" not in results
+
+
+def test_with_block_context_is_cleaned_up():
+    ctx = PyContextLocal()
+
+    with ctx:
+        ctx.value = 1
+        assert len(ctx._et_registry) == 1
+
+    assert len(ctx._et_registry) == 0
 
 
 def test_unique_context_for_generators_is_cleaned_up():
-    context_keys = set()
+    # frame ids can be reused: keep the namespaces alive and count them instead
+    namespaces = []
 
     ctx = PyContextLocal()
 
     @ctx
     def testcall():
-        context_keys.update(k.value for k in ctx._et_registry.keys())
+        namespaces.extend(ns for stack in ctx._et_registry.values() for ns in stack)
         yield None
 
-    for i in range(100):
-        for _ in testcall():
-            pass
-    gc.collect()
+    # On CPython, contexts must go away along with each generator, with
+    # no help from the cyclic collector:
+    gc.disable()
+    try:
+        for i in range(100):
+            for _ in testcall():
+                pass
+    finally:
+        gc.enable()
+    if sys.implementation.name != "cpython":
+        # Without reference counting, frames (and the registry entries
+        # anchored to them) are only released by the garbage collector
+        gc.collect()
 
-    assert len(context_keys) == 100
-    assert len(list(ctx._et_registry.keys())) == 0
+    assert len({id(ns) for ns in namespaces}) == 100
+    assert len(ctx._et_registry) == 0
 
 
 def recursive_size(obj):
     # WIP: to be used to test for memory leaks in
     # repeatedly called functions generators and co-routines
-    size = sys.getsizeof(obj)
-    if isinstance(obj, Mapping):
-        for key, value in obj.items:
-            size += recursive_size(key)
-            size += recursive_size(value)
-    elif isinstance(obj, Sequence):
-        for item in obj:
-            size += recursive_size(item)
-    elif hasattr(obj, "__dict__"):
-        size += recursive_size(obj.__dict__)
+    # Objects reachable through more than one path are counted once.
+    size = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, Mapping):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, Sequence) and not isinstance(obj, (str, bytes)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
     return size
 
 
-# def test_abusive_memory_leak():
-# ctx = PyContextLocal()
+def test_repeated_calls_do_not_grow_context_storage():
+    # Python implementation only:
+    ctx = PyContextLocal()
+    ctx.value = 0
+
+    @ctx
+    def func(n):
+        ctx.value = n
+
+    @ctx
+    def gen(n):
+        ctx.value = n
+        yield n
 
-# @ctx
-# def func(n):
+    def run_batch():
+        for i in range(1000):
+            func(i)
+            list(gen(i))
+        return recursive_size(ctx._et_registry) + recursive_size(ctx._et_anchors)
+
+    # The first batch lets the registry dicts settle on their table size
+    baseline = run_batch()
+    assert run_batch() == baseline
+    assert len(ctx._et_registry) == 1
 
 
 def test_contexts_keep_separate_variables():
@@ -281,8 +363,7 @@ def test_contexts_keep_separate_variables():
         assert c1.a == 1
         assert c2.a == 2
         del c2.a
-        with pytest.raises(AttributeError):
-            c2.a
+        assert getattr(c2, "a", _MISSING) is _MISSING
         assert c1.a == 1
 
     inner()
@@ -308,7 +389,6 @@ def test_context_dir():
     assert "var2" not in dir(ctx)
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_dir_context_should_not_show_deleted_attributes(ContextClass):
     ctx = ContextClass()
 
@@ -339,7 +419,6 @@ def test_dir_context_should_not_show_deleted_attributes(ContextClass):
     assert ctx.var1 == 1
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_dir_context_should_work_with_intermediate_deleted_attribute(ContextClass):
     ctx = ContextClass()
 
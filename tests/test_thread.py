@@ -1,12 +1,9 @@
 import threading
 import time
-from collections import deque
 
 import pytest
 
-from extracontext import PyContextLocal, NativeContextLocal
-
-consume = deque(maxlen=0).extend
+from extracontext import NativeContextLocal
 
 # These test whether values are _isolated_ across threads
 # (just like the original threading.local)/
@@ -14,33 +11,35 @@ consume = deque(maxlen=0).extend
 # see the "test_executors" file/
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_context_local_vars_work_for_threads(ContextClass):
 
     ctx = ContextClass()
 
-    results = set()
+    results = [None] * 10
+    # All workers set their value before any of them reads it back
+    barrier = threading.Barrier(10)
 
     @ctx
     def worker(value):
         ctx.value = value
-        time.sleep((10 - value) * 0.01)
+        barrier.wait()
         assert value == ctx.value
-        results.add(ctx.value)
+        results[value] = ctx.value
 
     @ctx
     def manager():
         ctx.value = -1
         tasks = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
-        consume(t.start() for t in tasks)
-        consume(t.join() for t in tasks)
-        assert all(i in results for i in range(10))
+        for t in tasks:
+            t.start()
+        for t in tasks:
+            t.join()
+        assert results == list(range(10))
         assert ctx.value == -1
 
     manager()
 
 
-@pytest.mark.parametrize(["ContextClass"], [(PyContextLocal,), (NativeContextLocal,)])
 def test_root_value_do_not_exist_on_new_thread(ContextClass):
     # Variable unset in the namespace in a new thread is the
     # behavior for threading.local and contextvar.ContextVar:
@@ -65,6 +64,29 @@ def test_root_value_do_not_exist_on_new_thread(ContextClass):
     assert not in_thread_exception
 
 
+def test_dir_on_new_thread_does_not_list_root_values(ContextClass):
+    ctx = ContextClass()
+
+    ctx.value = 23
+
+    in_thread_exception = None
+    in_thread_dir = None
+
+    def worker():
+        nonlocal in_thread_exception, in_thread_dir
+        try:
+            in_thread_dir = dir(ctx)
+        except Exception as error:
+            in_thread_exception = error
+            raise
+
+    t1 = threading.Thread(target=worker)
+    t1.start()
+    t1.join()
+    assert not in_thread_exception
+    assert in_thread_dir == []
+
+
 def test_native_context_local_interleaved_threads_context_manager():
 
     ctx = NativeContextLocal()